@@ -0,0 +1,257 @@
+"""Download MRI report pages from radrap.ch and build the training/testing corpus.
+
+Fetches every published report page, extracts the structured sections
+(Indication, Technique, Résultat, Conclusion) and saves the corpus under
+``Knowledge/`` as individual JSON files plus consolidated train/test files.
+"""
+
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import ahocorasick
+import lxml.html
+import orjson
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+from urllib3.util.retry import Retry
+
+BASE_URL = "https://radrap.ch"
+REPORT_IDS = range(1, 42)
+
+SECTION_ORDER = ["Indication", "Technique", "Résultat", "Conclusion"]
+
+# Interned so every parsed report shares one string object per type and
+# membership checks stay O(1).
+POSSIBLE_TYPES = frozenset(
+    sys.intern(t)
+    for t in ("MSK", "Abdomen", "Pelvis (féminin)", "Pelvis (masculin)", "Neuro-ORL")
+)
+
+# Compiled once: these patterns run for every line of every page, and
+# rebuilding them per iteration forces a regex-cache lookup each time.
+# A single alternation identifies the section in one match instead of
+# trying one pattern per known section.
+HEADER_RE = re.compile(
+    rf"^#?(?P<sec>{'|'.join(SECTION_ORDER)})\s*:?\s*(?P<rest>.*)$",
+    re.IGNORECASE,
+)
+CANONICAL_SECTIONS = {section.lower(): section for section in SECTION_ORDER}
+# The metadata filter is almost entirely fixed strings; an Aho-Corasick
+# automaton scans a line for all of them in one linear pass instead of a
+# backtracking alternation. Only the date stays a regex.
+METADATA_STRINGS = (
+    "Rad Rap",
+    "Accueil",
+    "Comptes rendus",
+    "Blog",
+    "Contact",
+    "Nicolas Villard",
+    "Copier directement le CR",
+)
+METADATA_AC = ahocorasick.Automaton()
+for _needle in METADATA_STRINGS:
+    METADATA_AC.add_word(_needle, _needle)
+METADATA_AC.make_automaton()
+DATE_RE = re.compile(r"\d{2}/\d{2}/\d{4}")
+URL_ID_RE = re.compile(r"comptesrendus/(\d+)")
+
+# XPath expressions compiled once and reused across every page; the same
+# three queries (title, breadcrumb type, body text) run on all ~41 documents.
+TITLE_XPATHS = tuple(
+    etree.XPath(expr) for expr in ("//h1/text()", "//h2/text()", "//title/text()")
+)
+BREADCRUMB_XP = etree.XPath(
+    "//li[contains(@class, 'breadcrumb-item') and contains(@class, 'active')"
+    " and @aria-current='page']/text()"
+)
+TEXT_XP = etree.XPath(
+    "//div/text()|//p/text()|//h1/text()|//h2/text()|//h3/text()|//h4/text()"
+)
+
+# One shared session for the whole crawl: every URL hits the same host, so
+# connection pooling + keep-alive removes the TCP/TLS handshake from all but
+# the first request per worker. Retries on transient errors are handled at
+# the urllib3 level instead of ad hoc loops in the extraction code.
+# The SQLite backend caches each page for a day (honouring Cache-Control and
+# revalidating via ETag/Last-Modified), so re-runs only refetch changed pages.
+SESSION = CachedSession(
+    "radrap_cache",
+    backend="sqlite",
+    expire_after=86400,
+    cache_control=True,
+)
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=8,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    ),
+)
+SESSION.headers.update(
+    {
+        "User-Agent": "Mozilla/5.0 (compatible; RadReportCollector/1.0)",
+        "Accept-Encoding": "gzip, deflate, br",
+    }
+)
+
+
+def fetch_report_html(url):
+    """Fetch a single report page and return its decompressed body."""
+    response = SESSION.get(url, timeout=(3.05, 10))
+    response.raise_for_status()
+    return response.content
+
+
+def parse_report_content(url, html):
+    """Extract title, type and sections from a fetched report page."""
+    tree = lxml.html.fromstring(html)
+
+    title = "Sans titre"
+    for xpath in TITLE_XPATHS:
+        found = xpath(tree)
+        if found and found[0].strip():
+            title = found[0].strip()
+            break
+
+    report_type = "Unknown"
+    for type_text in BREADCRUMB_XP(tree):
+        for possible in POSSIBLE_TYPES:
+            if possible in type_text:
+                report_type = possible
+                break
+
+    section_content = {section: [] for section in SECTION_ORDER}
+    current_section = None
+    for chunk in TEXT_XP(tree):
+        line = chunk.strip()
+        if not line:
+            continue
+        # Skip site chrome and metadata lines that surround the report body.
+        if next(METADATA_AC.iter(line), None) is not None or DATE_RE.search(line):
+            continue
+        header_match = HEADER_RE.match(line)
+        if header_match:
+            current_section = CANONICAL_SECTIONS[header_match.group("sec").lower()]
+            line = header_match.group("rest").strip()
+        if current_section and line:
+            section_content[current_section].append(line)
+
+    content = {
+        section: "\n".join(lines).strip()
+        for section, lines in section_content.items()
+        if lines
+    }
+
+    id_match = URL_ID_RE.search(url)
+    return {
+        "id": int(id_match.group(1)) if id_match else None,
+        "url": url,
+        "title": title,
+        "type": report_type,
+        "content": content,
+    }
+
+
+def download_mri_reports():
+    """Crawl every report page in parallel and return the extracted reports.
+
+    Fetching and parsing run in two specialised pools: the fetch pool is
+    sized to the session's connection pool (I/O-bound), and completed pages
+    are handed straight to a CPU-sized parse pool, so no worker holds a
+    keep-alive connection while it chews on HTML.
+    """
+    urls = [f"{BASE_URL}/comptesrendus/{report_id}" for report_id in REPORT_IDS]
+    reports = []
+    with ThreadPoolExecutor(max_workers=8) as fetch_pool, ThreadPoolExecutor(
+        max_workers=os.cpu_count() or 2
+    ) as parse_pool:
+        fetch_futures = {
+            fetch_pool.submit(fetch_report_html, url): url for url in urls
+        }
+        parse_futures = {}
+        for future in as_completed(fetch_futures):
+            url = fetch_futures[future]
+            try:
+                html = future.result()
+            except Exception as exc:
+                logging.warning("Failed to fetch %s: %s", url, exc)
+            else:
+                parse_futures[parse_pool.submit(parse_report_content, url, html)] = url
+        for future in as_completed(parse_futures):
+            url = parse_futures[future]
+            try:
+                report = future.result()
+            except Exception as exc:
+                logging.warning("Failed to parse %s: %s", url, exc)
+            else:
+                if report["content"]:
+                    reports.append(report)
+                    logging.info("Extracted %s (%s)", report["title"], report["type"])
+                else:
+                    logging.warning("No sections found in %s", url)
+    reports.sort(key=lambda report: report["id"] or 0)
+    return reports
+
+
+def _dump_json(path, obj):
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
+
+def _dump_json_array(path, records):
+    # Serialize one record at a time into a 1 MiB-buffered file so the
+    # consolidated corpus never exists as a single in-memory buffer.
+    with open(path, "wb", buffering=1024 * 1024) as f:
+        f.write(b"[\n")
+        for i, record in enumerate(records):
+            if i:
+                f.write(b",\n")
+            f.write(orjson.dumps(record, option=orjson.OPT_INDENT_2))
+        f.write(b"\n]")
+
+
+def split_and_save_reports(reports, train_ratio=0.8):
+    """Split reports into train/test sets and write them under Knowledge/."""
+    os.makedirs("Knowledge/training", exist_ok=True)
+    os.makedirs("Knowledge/testing", exist_ok=True)
+
+    split_index = int(len(reports) * train_ratio)
+    train_reports = reports[:split_index]
+    test_reports = reports[split_index:]
+
+    # The ~41 per-report files are independent and tiny, so their writes are
+    # latency-bound; a small pool overlaps the open/write/close round-trips.
+    jobs = [
+        (f"Knowledge/training/report_{i + 1}.json", report)
+        for i, report in enumerate(train_reports)
+    ] + [
+        (f"Knowledge/testing/report_{i + 1}.json", report)
+        for i, report in enumerate(test_reports)
+    ]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for _ in executor.map(lambda job: _dump_json(*job), jobs):
+            pass
+
+    _dump_json_array("Knowledge/training_reports.json", train_reports)
+    _dump_json_array("Knowledge/testing_reports.json", test_reports)
+
+    logging.info(
+        "Saved %d training and %d testing reports",
+        len(train_reports),
+        len(test_reports),
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    all_reports = download_mri_reports()
+    split_and_save_reports(all_reports)
@@ -0,0 +1,211 @@
+"""Extract per-type report templates from the training corpus.
+
+Groups the training reports by report type, keeps the sections present in at
+least 30% of that type's reports (plus the critical ones), and writes one
+JSON template per type under ``Knowledge/templates/``.
+"""
+
+import functools
+import json
+import logging
+import os
+import string
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+CRITICAL_SECTIONS = frozenset({"Indication", "Technique", "Résultat", "Conclusion"})
+
+# Corpora larger than this stream through ijson (when installed) instead of
+# being slurped, so the parse buffer stays at one record rather than the
+# whole file.
+_STREAM_THRESHOLD_BYTES = 256 * 1024 * 1024
+
+
+if orjson is not None:
+
+    def _loads(data):
+        return orjson.loads(data)
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    def _dumps_line(obj):
+        return orjson.dumps(obj)
+
+elif ujson is not None:
+    # ujson still encodes UTF-8 in one C pass, unlike stdlib json whose
+    # ensure_ascii=False path branches per character.
+
+    def _loads(data):
+        return ujson.loads(data)
+
+    def _dumps(obj):
+        return ujson.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+    def _dumps_line(obj):
+        return ujson.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+else:
+
+    def _loads(data):
+        return json.loads(data)
+
+    def _dumps(obj):
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+    def _dumps_line(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _write_file(path, data):
+    # Write-then-rename: a crash mid-write can never leave a truncated
+    # template behind, and the rename is a single atomic metadata op.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# Built once: maps every ASCII character outside the safe set to "_", so the
+# per-call substitution is a single C-level translate pass. The input is
+# pure ASCII by then (NFKD + ASCII-encode), so covering 0-127 is enough.
+_VALID_CHARS = set("-_.() " + string.ascii_letters + string.digits)
+_SANITIZE_TABLE = str.maketrans(
+    {c: "_" for c in map(chr, range(128)) if c not in _VALID_CHARS}
+)
+
+
+@functools.lru_cache(maxsize=256)
+def sanitize_filename(filename):
+    """Turn a report type into a safe ASCII filename fragment."""
+    if filename.isascii():
+        # Already ASCII (most modality codes): skip the NFKD fold and the
+        # encode/decode round-trip entirely.
+        stripped = filename
+    else:
+        # Deferred: only accented names pay the unicodedata import, and only
+        # once per process thanks to sys.modules.
+        import unicodedata
+
+        stripped = (
+            unicodedata.normalize("NFKD", filename)
+            .encode("ASCII", "ignore")
+            .decode("ASCII")
+        )
+    return stripped.translate(_SANITIZE_TABLE)
+
+
+def _group_reports(reports):
+    """Group reports by type and tally their sections in a single pass."""
+    grouped = defaultdict(lambda: ([], Counter()))
+    for report in reports:
+        report_type = report.get("type", "Unknown").strip()
+        type_reports, section_counts = grouped[report_type]
+        type_reports.append(report)
+        content = report.get("content")
+        if content:
+            # .keys() matters: passed the mapping itself, Counter would
+            # treat the section texts as counts instead of counting each
+            # section once.
+            section_counts.update(content.keys())
+    return grouped
+
+
+def extract_templates():
+    """Build one empty-section template per report type from the corpus."""
+    templates_dir = "Knowledge/templates"
+    os.makedirs(templates_dir, exist_ok=True)
+
+    corpus_path = "Knowledge/training_reports.json"
+    if ijson is not None and os.path.getsize(corpus_path) > _STREAM_THRESHOLD_BYTES:
+        with open(corpus_path, "rb") as f:
+            reports = ijson.items(f, "item")
+            grouped = _group_reports(reports)
+    else:
+        # One binary slurp: skips the incremental UTF-8 text decoder and
+        # hands the parser a single contiguous buffer.
+        with open(corpus_path, "rb") as f:
+            reports = _loads(f.read())
+        grouped = _group_reports(reports)
+
+    # Serialization is cheap and stays on this thread; the independent
+    # per-type writes are latency-bound syscalls, so they run in a pool.
+    write_jobs = []
+
+    # Joined once; inside the loop a single str.format call replaces the
+    # posixpath.join slash handling per template.
+    path_fmt = os.path.join(templates_dir, "{}_template.json")
+
+    # Types sharing a section set reuse one serialized sections block; only
+    # the short per-template type prefix is serialized again.
+    sections_blocks = {}
+
+    # The aggregate JSONL is written through one handle opened once, so the
+    # bulk of the output costs a single open/close regardless of how many
+    # types there are; the per-type files stay for downstream agents.
+    with open(os.path.join(templates_dir, "all_templates.jsonl"), "wb") as aggregate:
+        for report_type, (type_reports, section_counts) in grouped.items():
+            # Ceiling of 30% as an integer: count >= ceil(0.3 * n) matches
+            # the old float comparison exactly while keeping the comparisons
+            # int-int.
+            threshold = -(-(len(type_reports) * 3) // 10)
+            common_sections = {
+                section
+                for section, count in section_counts.items()
+                if count >= threshold
+            } | CRITICAL_SECTIONS
+
+            # Sorted so template files are byte-stable across runs despite
+            # the set union above.
+            sections_key = tuple(sorted(common_sections))
+            template = {
+                "type": report_type,
+                "sections": dict.fromkeys(sections_key, ""),
+            }
+
+            block = sections_blocks.get(sections_key)
+            if block is None:
+                # Outer "{\n" / "\n}" stripped so the block can be spliced
+                # in after the type field below.
+                block = _dumps({"sections": template["sections"]})[2:-2]
+                sections_blocks[sections_key] = block
+            template_bytes = (
+                b'{\n  "type": ' + _dumps_line(report_type) + b",\n" + block + b"\n}"
+            )
+
+            safe_report_type = sanitize_filename(report_type.lower())
+            template_filename = path_fmt.format(safe_report_type)
+            write_jobs.append((template_filename, template_bytes))
+            aggregate.write(_dumps_line(template) + b"\n")
+            logging.info(
+                "Wrote template for %s (%d sections)",
+                report_type,
+                len(sections_key),
+            )
+
+    if write_jobs:
+        with ThreadPoolExecutor(max_workers=min(32, len(write_jobs))) as executor:
+            for _ in executor.map(lambda job: _write_file(*job), write_jobs):
+                pass
+
+    logging.info("Extracted %d templates", len(grouped))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    extract_templates()